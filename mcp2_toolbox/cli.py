@@ -2,38 +2,39 @@ import os
 import sys
 import json
 import time
-import shlex
-import subprocess
+import shutil
 import logging
+import threading
 import argparse
-from dataclasses import dataclass
-from typing import List, Optional, Dict, Any
-from pathlib import Path
-
-try:
-    import yaml
-except ImportError:
-    yaml = None
-
-try:
-    from zeroconf import ServiceBrowser, Zeroconf
-except ImportError:
-    Zeroconf = None
-
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+import atexit
+import importlib
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Callable, List, Mapping, Optional, Dict, Any, Tuple
+
+
+# Handlers are installed by main(); importing the module configures nothing.
 logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
 
 
-@dataclass
+@dataclass(frozen=True)
 class Device:
+    # Hand-written __slots__ since dataclass(slots=True) needs Python 3.10.
+    __slots__ = ("name", "ip")
     name: str
     ip: str
 
+    # Frozen slots reject the setattr copy/pickle use to restore state.
+    def __getstate__(self) -> Tuple[str, str]:
+        return (self.name, self.ip)
+
+    def __setstate__(self, state: Tuple[str, str]) -> None:
+        object.__setattr__(self, "name", state[0])
+        object.__setattr__(self, "ip", state[1])
+
 
 class MCP2ToolboxError(Exception):
     """Base exception for MCP2 Toolbox errors."""
@@ -50,61 +51,275 @@ class DeviceError(MCP2ToolboxError):
     pass
 
 
-def load_config() -> Dict[str, Any]:
-    """Load configuration from YAML file with proper error handling."""
-    config_path = os.path.expanduser("~/.config/console-hax/mcp2-toolbox.yml")
+@lru_cache(maxsize=None)
+def _optional_module(name: str) -> Any:
+    """Import an optional dependency on first use; None if it is not installed.
+
+    The outcome is memoized, so a missing package is looked up once per
+    process rather than on every config read or discovery.
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+# Parsed YAML files keyed by path, validated against (mtime_ns, size) on each read.
+_YAML_CACHE: "OrderedDict[str, Tuple[int, int, Dict[str, Any]]]" = OrderedDict()
+_YAML_CACHE_MAX = 32
+
+
+def _write_sidecar(path: str, data: Dict[str, Any], src: os.stat_result) -> None:
+    """Best-effort write of a JSON copy of parsed YAML next to ``path``.
+
+    The copy records the YAML's ``src`` stat it was made from. It is skipped
+    when JSON cannot represent ``data`` exactly (e.g. non-string keys).
+    """
+    try:
+        payload = json.dumps({"src": [src.st_mtime_ns, src.st_size], "data": data})
+        if json.loads(payload)["data"] != data:
+            logger.debug(f"Not writing JSON sidecar for {path}: data does not round-trip")
+            return
+        with open(path + ".json", "w", encoding="utf-8") as f:
+            f.write(payload)
+    except (OSError, TypeError, ValueError) as e:
+        logger.debug(f"Could not write JSON sidecar for {path}: {e}")
+
+
+def _read_sidecar(path: str, st: os.stat_result) -> Optional[Dict[str, Any]]:
+    """Return the JSON sidecar for ``path`` if it was made from the YAML stat ``st``."""
+    try:
+        with open(path + ".json", "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(payload, dict) or payload.get("src") != [st.st_mtime_ns, st.st_size]:
+        return None
+    data = payload.get("data")
+    return data if isinstance(data, dict) else None
+
+
+def _load_yaml_cached(path: str) -> Mapping[str, Any]:
+    """Parse a YAML file, reusing the cached result while mtime and size match.
+
+    Every caller gets a view of the same parsed mapping whose top-level keys
+    are read-only; nested lists and dicts are shared, not copied. Raises
+    FileNotFoundError if ``path`` does not exist, ImportError if it has to be
+    parsed without PyYAML, and ConfigurationError if it is invalid YAML.
+    """
+    st = os.stat(path)
+    cached = _YAML_CACHE.get(path)
+    if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+        _YAML_CACHE.move_to_end(path)
+        return MappingProxyType(cached[2])
+    data = _read_sidecar(path, st)
+    if data is None:
+        yaml = _optional_module("yaml")
+        if yaml is None:
+            raise ImportError("PyYAML is not installed")
+        with open(path, "rb") as f:
+            try:
+                data = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
+            except yaml.YAMLError as e:
+                raise ConfigurationError(f"Invalid YAML in config file: {e}") from e
+        if not isinstance(data, dict):
+            raise ConfigurationError("config file must contain a mapping")
+        _write_sidecar(path, data, st)
+    _YAML_CACHE[path] = (st.st_mtime_ns, st.st_size, data)
+    if len(_YAML_CACHE) > _YAML_CACHE_MAX:
+        _YAML_CACHE.popitem(last=False)
+    return MappingProxyType(data)
+
+
+_EMPTY_CONFIG: Mapping[str, Any] = MappingProxyType({})
+
+
+def load_config() -> Mapping[str, Any]:
+    """Load configuration from YAML file with proper error handling.
+
+    The result is shared with other callers and only its top-level keys are
+    read-only; deep-copy it before changing it or any nested value.
+    """
+    config_path = _cfg_path()
     
-    if not os.path.exists(config_path):
+    try:
+        config = _load_yaml_cached(config_path)
+    except FileNotFoundError:
         logger.debug(f"Config file not found: {config_path}")
-        return {}
-    
-    if not yaml:
+        return _EMPTY_CONFIG
+    except ImportError:
         logger.warning("PyYAML not available, cannot load config")
-        return {}
-    
-    try:
-        with open(config_path, "r", encoding="utf-8") as f:
-            config = yaml.safe_load(f) or {}
-            logger.debug(f"Loaded config from {config_path}")
-            return config
-    except yaml.YAMLError as e:
+        return _EMPTY_CONFIG
+    except ConfigurationError as e:
         logger.error(f"Error parsing config file {config_path}: {e}")
-        raise ConfigurationError(f"Invalid YAML in config file: {e}")
+        raise
     except Exception as e:
         logger.error(f"Error loading config file {config_path}: {e}")
         raise ConfigurationError(f"Failed to load config: {e}")
+    
+    logger.debug(f"Loaded config from {config_path}")
+    return config
 
 
-def discover(timeout_sec: float = 2.0) -> List[Device]:
-    """Discover MCP2 devices using mDNS/Zeroconf."""
-    devices: List[Device] = []
+# MCP2 devices advertise under their own service type; browsing the generic
+# _http._tcp type as well only pulled in every printer and TV on the LAN.
+_SERVICE_TYPES = ("_memcardpro._tcp.local.",)
+# After the first answer, how long to keep listening for further devices.
+# Responders may delay shared-record answers by 20-120 ms (RFC 6762 s6.3).
+_DISCOVERY_GRACE_SEC = 0.15
+# Announced services are resolved concurrently, each bounded by this timeout.
+_RESOLVE_WORKERS = 8
+_RESOLVE_TIMEOUT_MS = 1000
+
+# Last non-empty discovery result, reused by back-to-back invocations.
+_DISC_CACHE = os.path.expanduser("~/.cache/console-hax/mcp2-discovered.json")
+_DISC_TTL = 10.0
+
+
+def _read_discovery_cache() -> Optional[List[Device]]:
+    """Return devices from the discovery cache if it is younger than ``_DISC_TTL``."""
+    try:
+        with open(_DISC_CACHE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if 0 <= time.time() - cache["ts"] < _DISC_TTL:
+            return [Device(**d) for d in cache["devs"]]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.debug(f"Ignoring discovery cache {_DISC_CACHE}: {e}")
+    return None
+
+
+def _write_discovery_cache(devices: List[Device]) -> None:
+    try:
+        os.makedirs(os.path.dirname(_DISC_CACHE), exist_ok=True)
+        payload = json.dumps({"ts": time.time(), "devs": [asdict(d) for d in devices]})
+        with open(_DISC_CACHE, "w", encoding="utf-8") as f:
+            f.write(payload)
+    except OSError as e:
+        logger.debug(f"Could not write discovery cache {_DISC_CACHE}: {e}")
+
+
+# Process-wide Zeroconf instance: sockets and multicast membership are set up
+# once and its record cache stays warm across discover() calls.
+_ZC: Any = None
+
+
+def _get_zc() -> Any:
+    global _ZC
+    if _ZC is None:
+        _ZC = _optional_module("zeroconf").Zeroconf()
+        atexit.register(_ZC.close)
+    return _ZC
+
+
+class _DiscoveryListener:
+    """Collects services reported by a long-lived ServiceBrowser.
+
+    zeroconf calls the ``*_service`` hooks on its own thread, so they only
+    record names; discover() resolves pending names and keeps the results in
+    ``found`` for later calls.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.seen = threading.Event()
+        self.pending: Dict[Tuple[str, str], None] = {}
+        self.found: Dict[str, str] = {}
+
+    def add_service(self, zc: Any, service_type: str, name: str) -> None:
+        with self.lock:
+            self.pending[(service_type, name)] = None
+        self.seen.set()
+
+    def update_service(self, zc: Any, service_type: str, name: str) -> None:
+        self.add_service(zc, service_type, name)
+
+    def remove_service(self, zc: Any, service_type: str, name: str) -> None:
+        with self.lock:
+            self.pending.pop((service_type, name), None)
+            self.found.pop(name, None)
+
+    def take_pending(self) -> List[Tuple[str, str]]:
+        with self.lock:
+            services = list(self.pending)
+            self.pending.clear()
+        return services
+
+
+# One browser per set of service types, kept running for the whole process.
+_BROWSERS: Dict[Tuple[str, ...], Tuple[Any, _DiscoveryListener]] = {}
+
+
+def _get_listener(service_types: Tuple[str, ...]) -> _DiscoveryListener:
+    entry = _BROWSERS.get(service_types)
+    if entry is None:
+        listener = _DiscoveryListener()
+        browser = _optional_module("zeroconf").ServiceBrowser(_get_zc(), list(service_types), listener)
+        atexit.register(browser.cancel)
+        entry = _BROWSERS[service_types] = (browser, listener)
+    return entry[1]
+
+
+def _resolve_ip(zc: Any, service_type: str, name: str) -> Optional[str]:
+    """First resolved address of ``name``, preferring IPv4 over IPv6."""
+    info = zc.get_service_info(service_type, name, timeout=_RESOLVE_TIMEOUT_MS)
+    # ServiceInfo.addresses is IPv4-only; parsed_addresses() covers both
+    # families, IPv4 first, already formatted.
+    addrs = info.parsed_addresses() if info else []
+    return addrs[0] if addrs else None
+
+
+def discover(timeout_sec: float = 0.5, use_cache: bool = True) -> List[Device]:
+    """Discover MCP2 devices using mDNS/Zeroconf.
+
+    Waits up to ``timeout_sec`` for the first device to answer, then briefly
+    for more. Resolving the answers is bounded separately, by
+    ``_RESOLVE_TIMEOUT_MS`` per device in parallel. The browser keeps running
+    between calls, so later calls mostly return what it has already seen. A
+    non-empty result is cached on disk for ``_DISC_TTL`` seconds and reused
+    unless ``use_cache`` is False.
+    """
+    if use_cache:
+        cached = _read_discovery_cache()
+        if cached is not None:
+            logger.debug(f"Using {len(cached)} cached device(s) from {_DISC_CACHE}")
+            return cached
     
-    if not Zeroconf:
+    if _optional_module("zeroconf") is None:
         logger.warning("Zeroconf not available, cannot discover devices")
-        return devices
+        return []
+    
+    from concurrent.futures import ThreadPoolExecutor
     
     try:
-        zc = Zeroconf()
-        found = {}
-
-        class Listener:
-            def add_service(self, zc, t, name):
-                try:
-                    info = zc.get_service_info(t, name)
-                    if info and info.addresses:
-                        ip = ".".join(map(str, info.addresses[0]))
-                        found[name] = ip
-                        logger.debug(f"Discovered device: {name} at {ip}")
-                except Exception as e:
-                    logger.warning(f"Error processing service {name}: {e}")
-
-        ServiceBrowser(zc, ["_http._tcp.local.", "_memcardpro._tcp.local."], Listener())
-        logger.info(f"Discovering devices for {timeout_sec} seconds...")
-        time.sleep(timeout_sec)
-        zc.close()
+        zc = _get_zc()
+        listener = _get_listener(_SERVICE_TYPES)
+        logger.info(f"Waiting up to {timeout_sec} seconds for devices to answer...")
+        deadline = time.monotonic() + timeout_sec
+        if listener.seen.wait(timeout_sec):
+            time.sleep(max(0.0, min(_DISCOVERY_GRACE_SEC, deadline - time.monotonic())))
+
+        services = listener.take_pending()
+        if services:
+            with ThreadPoolExecutor(max_workers=min(_RESOLVE_WORKERS, len(services))) as pool:
+                futures = [(t, name, pool.submit(_resolve_ip, zc, t, name)) for t, name in services]
+                for t, name, fut in futures:
+                    try:
+                        ip = fut.result()
+                    except Exception as e:
+                        logger.warning(f"Error processing service {name}: {e}")
+                        ip = None
+                    if not ip:
+                        # Retry on the next call; the browser won't announce it again.
+                        listener.add_service(zc, t, name)
+                        continue
+                    with listener.lock:
+                        listener.found[name] = ip
+                    logger.debug(f"Discovered device: {name} at {ip}")
         
-        for name, ip in found.items():
-            devices.append(Device(name=name, ip=ip))
+        with listener.lock:
+            devices = [Device(name=name, ip=ip) for name, ip in listener.found.items()]
+        if devices:
+            _write_discovery_cache(devices)
         
         logger.info(f"Discovered {len(devices)} device(s)")
         return devices
@@ -114,25 +329,66 @@ def discover(timeout_sec: float = 2.0) -> List[Device]:
         raise DeviceError(f"Device discovery failed: {e}")
 
 
-def cmd_list():
-    devs = discover()
-    for d in devs:
-        print(f"{d.name}\t{d.ip}")
-    if not devs:
-        print("No MCP2 devices found (mdns). Try manual IP.")
+def cmd_list(no_cache: bool = False):
+    devs = discover(use_cache=not no_cache)
+    if devs:
+        sys.stdout.write("".join(f"{d.name}\t{d.ip}\n" for d in devs))
+    else:
+        sys.stdout.write("No MCP2 devices found (mdns). Try manual IP.\n")
 
 
+@lru_cache(maxsize=1)
 def gum_available() -> bool:
-    return False
+    """Return True if the ``gum`` binary is on PATH (looked up once per process)."""
+    return shutil.which("gum") is not None
+
+
+def _gum(*args: str) -> str:
+    """Run ``gum`` directly (no shell) and return its stripped stdout.
+
+    gum draws its UI on the terminal and prints only the result, so just
+    stdout is captured. gum keeps the terminal in raw mode, so Ctrl+C and Esc
+    show up as a non-zero exit (130) rather than SIGINT; that is raised as
+    KeyboardInterrupt, matching a cancelled ``input()``.
+    """
+    import subprocess
+    try:
+        return subprocess.check_output(["gum", *args], text=True).strip()
+    except subprocess.CalledProcessError:
+        raise KeyboardInterrupt from None
+
+
+def _gum_choose(options: List[str]) -> str:
+    """Pick one of ``options`` with ``gum choose``; raises KeyboardInterrupt if cancelled."""
+    return _gum("choose", *options)
+
+
+def _gum_input(prompt: str, initial: str) -> str:
+    """Read a value with ``gum input``, keeping ``initial`` if left empty.
 
+    Raises KeyboardInterrupt if the prompt is cancelled.
+    """
+    return _gum("input", "--prompt", f"{prompt}: ", "--value", initial) or initial
 
-def cmd_ui():
-    devs = discover()
+
+def _prompt(label: str, default: str) -> str:
+    if gum_available():
+        return _gum_input(label, default)
+    return input(f"{label} [{default}]: ").strip() or default
+
+
+def cmd_ui(no_cache: bool = False):
+    devs = discover(use_cache=not no_cache)
     opts = [f"{d.name} ({d.ip})" for d in devs] or ["Manual IP"]
-    print("Select device:")
-    for i, o in enumerate(opts):
-        print(f"  {i+1}. {o}")
-    choice = opts[int(input("> ")) - 1]
+    if gum_available():
+        choice = _gum_choose(opts)
+        if not choice:
+            return
+    else:
+        print("Select device:")
+        for i, o in enumerate(opts):
+            print(f"  {i+1}. {o}")
+        choice = opts[int(input("> ")) - 1]
     if choice == "Manual IP":
         target = input("Enter IP: ").strip()
     else:
@@ -143,131 +399,197 @@ def cmd_ui():
 
 CH_BASE = "/home/hairglasses/Docs/console-hax"
 
-
-def _env_with(overrides: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+# Helper scripts run by the project commands, relative to CH_BASE.
+_SCRIPT_PATHS = {
+    "new": ("hg_ps2_bootstrap", "scripts", "new_visualizer.sh"),
+    "watch": ("pcsx2_scaffold", "scripts", "watch_build_run.sh"),
+    "watch_win": ("pcsx2_scaffold", "scripts", "watch_build_run_win.sh"),
+    "run": ("pcsx2_scaffold", "scripts", "run_pcsx2.sh"),
+    "run_win": ("pcsx2_scaffold", "scripts", "run_pcsx2_win.sh"),
+    "hooks": ("pcsx2_scaffold", "scripts", "install_git_hooks.sh"),
+}
+
+# Default project locations used when neither the CLI nor the config sets one.
+_DEFAULT_PATHS = {
+    "project": ("hairglasses_ps2_visualizer_classic",),
+    "elf": ("hairglasses_ps2_visualizer_classic", "bin", "hg_ps2_visualizer.elf"),
+}
+
+
+@lru_cache(maxsize=None)
+def _base_paths(base: str) -> Dict[str, str]:
+    """Absolute script and default paths under ``base``, built once per base path."""
+    table = {**_SCRIPT_PATHS, **_DEFAULT_PATHS}
+    return {key: os.path.join(base, *parts) for key, parts in table.items()}
+
+
+def _script(key: str) -> str:
+    """Return the path of helper script ``key``, failing early if it is missing."""
+    path = _base_paths(CH_BASE)[key]
+    if not os.path.isfile(path):
+        raise ConfigurationError(f"Script not found: {path} (check --base-path or CONSOLE_HAX_BASE)")
+    return path
+
+
+def _env_with(overrides: Optional[Dict[str, Optional[str]]] = None) -> Mapping[str, str]:
+    """Child environment: the live ``os.environ`` unless something is overridden."""
+    filtered = {k: v for k, v in (overrides or {}).items() if v is not None}
+    if not filtered:
+        return os.environ
     env = os.environ.copy()
-    if overrides:
-        env.update({k: v for k, v in overrides.items() if v is not None})
+    env.update(filtered)
     return env
 
 
-def _run_script(path: str, args: Optional[List[str]] = None, env_overrides: Optional[Dict[str, str]] = None, background: bool = False) -> int:
+def _run_script(path: str, args: Optional[List[str]] = None, env_overrides: Optional[Dict[str, Optional[str]]] = None, background: bool = False, replace: bool = False) -> int:
+    """Run a helper script and return its exit code.
+
+    With ``replace=True`` (foreground only) the script is exec'd in place of
+    this process on POSIX, so the call never returns; a failed exec raises
+    OSError.
+    """
     cmd = [path] + (args or [])
+    if replace and not background and os.name == "posix":
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execvpe(path, cmd, _env_with(env_overrides))
+    import subprocess
+    # close_fds=False keeps subprocess on its posix_spawn (vfork) fast path
+    # rather than fork+exec; the CLI holds no inheritable descriptors (PEP 446).
     if background:
-        proc = subprocess.Popen(cmd, env=_env_with(env_overrides))
-        print(f"started: pid={proc.pid} -> {' '.join(shlex.quote(c) for c in cmd)}")
+        proc = subprocess.Popen(cmd, env=_env_with(env_overrides), close_fds=False)
+        # Shell quoting is only for a human to copy-paste; scripts get raw args.
+        if sys.stdout.isatty():
+            import shlex
+            shown = " ".join(shlex.quote(c) for c in cmd)
+        else:
+            shown = " ".join(cmd)
+        print(f"started: pid={proc.pid} -> {shown}")
         return 0
-    res = subprocess.run(cmd, env=_env_with(env_overrides))
+    res = subprocess.run(cmd, env=_env_with(env_overrides), close_fds=False)
     return res.returncode
 
 
+_KV_FLAGS = {
+    "--project": "project",
+    "--elf": "elf",
+    "--build": "build",
+    "--pcsx2-exe": "pcsx2_exe",
+}
+
+
 def _parse_kv(args: List[str]) -> Dict[str, str]:
     out: Dict[str, str] = {}
-    i = 0
-    while i < len(args):
-        a = args[i]
-        if a in ("--project", "--elf", "--build", "--pcsx2-exe"):
-            if i + 1 >= len(args):
-                raise SystemExit(f"missing value for {a}")
-            key = a.lstrip("-").replace("-", "_")
-            out[key] = args[i + 1]
-            i += 2
+    it = iter(args)
+    for arg in it:
+        key = _KV_FLAGS.get(arg)
+        if key is None:
             continue
-        i += 1
+        try:
+            out[key] = next(it)
+        except StopIteration:
+            raise SystemExit(f"missing value for {arg}") from None
     return out
 
 
-def cmd_new(args: List[str]):
+def cmd_new(args: List[str]) -> int:
     if not args:
         print("usage: mcp2-toolbox new <name> [dest]")
-        sys.exit(1)
+        return 1
     name = args[0]
     dest = args[1] if len(args) > 1 else os.path.join(CH_BASE, name)
-    script = os.path.join(CH_BASE, "hg_ps2_bootstrap", "scripts", "new_visualizer.sh")
-    rc = _run_script(script, [name, dest])
-    sys.exit(rc)
+    script = _script("new")
+    return _run_script(script, [name, dest], replace=True)
 
 
-def cmd_watch(args: List[str]):
-    use_win = "--win" in args
-    kv = _parse_kv(args)
-    script = os.path.join(CH_BASE, "pcsx2_scaffold", "scripts", "watch_build_run_win.sh" if use_win else "watch_build_run.sh")
+def _watch_with(kv: Dict[str, str], use_win: bool) -> int:
+    script = _script("watch_win" if use_win else "watch")
     env = {
         "TARGET_PROJECT": kv.get("project"),
         "TARGET_ELF": kv.get("elf"),
         "BUILD_CMD": kv.get("build"),
         "WIN_PCSX2_EXE": kv.get("pcsx2_exe"),
     }
-    rc = _run_script(script, env_overrides=env, background=False)
-    sys.exit(rc)
+    return _run_script(script, env_overrides=env, replace=True)
+
+
+def cmd_watch(args: List[str]) -> int:
+    return _watch_with(_parse_kv(args), "--win" in args)
 
 
-def cmd_run(args: List[str]):
-    use_win = "--win" in args
-    kv = _parse_kv(args)
+def _run_with(kv: Dict[str, str], use_win: bool) -> int:
+    call_args = ["--elf", kv["elf"]] if kv.get("elf") else []
     if use_win:
-        script = os.path.join(CH_BASE, "pcsx2_scaffold", "scripts", "run_pcsx2_win.sh")
-        call_args: List[str] = []
-        if kv.get("elf"):
-            call_args = ["--elf", kv["elf"]]
+        script = _script("run_win")
         env = {"WIN_PCSX2_EXE": kv.get("pcsx2_exe")}
-        rc = _run_script(script, args=call_args, env_overrides=env)
-        sys.exit(rc)
-    else:
-        script = os.path.join(CH_BASE, "pcsx2_scaffold", "scripts", "run_pcsx2.sh")
-        call_args = []
-        if kv.get("elf"):
-            call_args = ["--elf", kv["elf"]]
-        rc = _run_script(script, args=call_args)
-        sys.exit(rc)
+        return _run_script(script, args=call_args, env_overrides=env, replace=True)
+    script = _script("run")
+    return _run_script(script, args=call_args, replace=True)
+
 
+def cmd_run(args: List[str]) -> int:
+    return _run_with(_parse_kv(args), "--win" in args)
 
-def cmd_hook_install(args: List[str]):
-    repo = args[0] if args else os.path.join(CH_BASE, "hairglasses_ps2_visualizer_classic")
-    script = os.path.join(CH_BASE, "pcsx2_scaffold", "scripts", "install_git_hooks.sh")
-    rc = _run_script(script, [repo])
-    sys.exit(rc)
 
+def cmd_hook_install(args: List[str]) -> int:
+    repo = args[0] if args else _base_paths(CH_BASE)["project"]
+    script = _script("hooks")
+    return _run_script(script, [repo], replace=True)
 
+
+@lru_cache(maxsize=1)
 def _cfg_path() -> str:
     return os.path.expanduser("~/.config/console-hax/mcp2-toolbox.yml")
 
 
-def _cfg_load() -> Dict[str, str]:
-    p = _cfg_path()
-    if not os.path.exists(p) or not yaml:
-        return {}
-    with open(p, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or {}
+# The config command reads through the same cached loader as load_config().
+_cfg_load = load_config
 
 
 def _cfg_save(cfg: Dict[str, str]) -> None:
     p = _cfg_path()
     os.makedirs(os.path.dirname(p), exist_ok=True)
-    if yaml:
-        with open(p, "w", encoding="utf-8") as f:
-            f.write(yaml.safe_dump(cfg, sort_keys=True))
+    yaml = _optional_module("yaml")
+    if yaml is None:
+        return
+    with open(p, "w", encoding="utf-8") as f:
+        yaml.dump(cfg, f, Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper), sort_keys=True)
+    _write_sidecar(p, cfg, os.stat(p))
+    _YAML_CACHE.pop(p, None)
 
 
 def cmd_config(args: List[str]):
     cfg = _cfg_load()
+    paths = _base_paths(CH_BASE)
     defaults = {
-        "project": cfg.get("project", os.path.join(CH_BASE, "hairglasses_ps2_visualizer_classic")),
-        "elf": cfg.get("elf", os.path.join(CH_BASE, "hairglasses_ps2_visualizer_classic", "bin", "hg_ps2_visualizer.elf")),
+        "project": cfg.get("project", paths["project"]),
+        "elf": cfg.get("elf", paths["elf"]),
         "build": cfg.get("build", "./tools/build_ee.sh --docker --fast"),
         "pcsx2_exe": cfg.get("pcsx2_exe", ""),
     }
-    project = input(f"TARGET_PROJECT [{defaults['project']}]: ").strip() or defaults["project"]
-    elf = input(f"TARGET_ELF [{defaults['elf']}]: ").strip() or defaults["elf"]
-    build = input(f"BUILD_CMD [{defaults['build']}]: ").strip() or defaults["build"]
-    pcsx2_exe = input(f"WIN_PCSX2_EXE (optional) [{defaults['pcsx2_exe']}]: ").strip() or defaults["pcsx2_exe"]
+    project = _prompt("TARGET_PROJECT", defaults["project"])
+    elf = _prompt("TARGET_ELF", defaults["elf"])
+    build = _prompt("BUILD_CMD", defaults["build"])
+    pcsx2_exe = _prompt("WIN_PCSX2_EXE (optional)", defaults["pcsx2_exe"])
     new_cfg = {"project": project, "elf": elf, "build": build, "pcsx2_exe": pcsx2_exe}
     _cfg_save(new_cfg)
     print(f"wrote {_cfg_path()}")
 
 
+def _default_base_path() -> str:
+    return os.environ.get('CONSOLE_HAX_BASE', '/home/hairglasses/Docs/console-hax')
+
+
+_PARSER: Optional[argparse.ArgumentParser] = None
+
+
 def create_parser() -> argparse.ArgumentParser:
-    """Create command line argument parser."""
+    """Create command line argument parser (built once, then reused)."""
+    global _PARSER
+    if _PARSER is not None:
+        # CONSOLE_HAX_BASE may have changed since the parser was built.
+        _PARSER.set_defaults(base_path=_default_base_path())
+        return _PARSER
     parser = argparse.ArgumentParser(
         description="MemCard Pro 2 helper tools",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -297,17 +619,19 @@ Examples:
     parser.add_argument(
         '--base-path',
         type=str,
-        default=os.environ.get('CONSOLE_HAX_BASE', '/home/hairglasses/Docs/console-hax'),
+        default=_default_base_path(),
         help='Base path for console-hax projects (default: %(default)s)'
     )
     
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
     # List command
-    subparsers.add_parser('list', help='List discovered MCP2 devices')
+    list_parser = subparsers.add_parser('list', help='List discovered MCP2 devices')
+    list_parser.add_argument('--no-cache', action='store_true', help='Ignore cached discovery results')
     
     # UI command
-    subparsers.add_parser('ui', help='Interactive device selection')
+    ui_parser = subparsers.add_parser('ui', help='Interactive device selection')
+    ui_parser.add_argument('--no-cache', action='store_true', help='Ignore cached discovery results')
     
     # New command
     new_parser = subparsers.add_parser('new', help='Create new PS2 visualizer project')
@@ -335,65 +659,83 @@ Examples:
     # Config command
     subparsers.add_parser('config', help='Configure defaults')
     
+    _PARSER = parser
     return parser
 
 
+def _ns_kv(args: argparse.Namespace) -> Dict[str, str]:
+    """The watch/run options given on the command line, keyed like ``_parse_kv``."""
+    return {key: getattr(args, key) for key in _KV_FLAGS.values() if getattr(args, key, None)}
+
+
+# Subcommand name -> handler; handlers return an exit code (None means 0).
+_COMMANDS: Dict[str, Callable[[argparse.Namespace], Optional[int]]] = {
+    "list": lambda a: cmd_list(no_cache=a.no_cache),
+    "ui": lambda a: cmd_ui(no_cache=a.no_cache),
+    "new": lambda a: cmd_new([a.name] + ([a.dest] if a.dest else [])),
+    "watch": lambda a: _watch_with(_ns_kv(a), a.win),
+    "run": lambda a: _run_with(_ns_kv(a), a.win),
+    "hook-install": lambda a: cmd_hook_install([a.repo] if a.repo else []),
+    "config": lambda a: cmd_config([]),
+}
+
+
+# Subcommands that take no required arguments, with their option defaults.
+# A bare ``mcp2-toolbox <cmd>`` for these skips building the argparse parser.
+_FAST_COMMANDS: Dict[str, Dict[str, Any]] = {
+    "list": {"no_cache": False},
+    "ui": {"no_cache": False},
+    "config": {},
+}
+
+
+def _fast_args(argv: List[str]) -> Optional[argparse.Namespace]:
+    """Namespace for a bare fast-path subcommand, or None if argparse is needed."""
+    if len(argv) != 1 or argv[0] not in _FAST_COMMANDS:
+        return None
+    return argparse.Namespace(
+        verbose=False, base_path=_default_base_path(), command=argv[0], **_FAST_COMMANDS[argv[0]]
+    )
+
+
+def _configure_logging(verbose: bool) -> None:
+    """Timestamped debug output with --verbose, plain level/message otherwise."""
+    level = logging.DEBUG if verbose else logging.INFO
+    if verbose:
+        logging.basicConfig(
+            level=level,
+            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+    else:
+        logging.basicConfig(level=level, format='%(levelname)s: %(message)s')
+    # basicConfig is a no-op once the root logger has handlers (an embedding
+    # host, a second main() call), so apply the level regardless.
+    logging.getLogger().setLevel(level)
+
+
 def main():
     """Main entry point with improved error handling."""
     try:
-        parser = create_parser()
-        args = parser.parse_args()
+        args = _fast_args(sys.argv[1:])
+        if args is None:
+            parser = create_parser()
+            args = parser.parse_args()
+            if not args.command:
+                parser.print_help()
+                return 1
         
-        # Configure logging level
-        if args.verbose:
-            logging.getLogger().setLevel(logging.DEBUG)
+        _configure_logging(args.verbose)
         
         # Update global base path
         global CH_BASE
         CH_BASE = args.base_path
         
-        if not args.command:
-            parser.print_help()
-            return 1
-        
         # Route to appropriate command
-        if args.command == "list":
-            cmd_list()
-        elif args.command == "ui":
-            cmd_ui()
-        elif args.command == "new":
-            cmd_new([args.name] + ([args.dest] if args.dest else []))
-        elif args.command == "watch":
-            watch_args = []
-            if args.win:
-                watch_args.append("--win")
-            if args.project:
-                watch_args.extend(["--project", args.project])
-            if args.elf:
-                watch_args.extend(["--elf", args.elf])
-            if args.build:
-                watch_args.extend(["--build", args.build])
-            if args.pcsx2_exe:
-                watch_args.extend(["--pcsx2-exe", args.pcsx2_exe])
-            cmd_watch(watch_args)
-        elif args.command == "run":
-            run_args = []
-            if args.win:
-                run_args.append("--win")
-            if args.elf:
-                run_args.extend(["--elf", args.elf])
-            if args.pcsx2_exe:
-                run_args.extend(["--pcsx2-exe", args.pcsx2_exe])
-            cmd_run(run_args)
-        elif args.command == "hook-install":
-            cmd_hook_install([args.repo] if args.repo else [])
-        elif args.command == "config":
-            cmd_config([])
-        else:
+        handler = _COMMANDS.get(args.command)
+        if handler is None:
             logger.error(f"Unknown command: {args.command}")
             return 1
-            
-        return 0
+        return handler(args) or 0
         
     except KeyboardInterrupt:
         logger.info("Operation cancelled by user")
@@ -407,6 +749,6 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
 
@@ -3,15 +3,36 @@
 import pytest
 import tempfile
 import os
+import sys
+import time
+import subprocess
+import json
+import copy
+import pickle
+import dataclasses
+import logging
 from unittest.mock import patch, MagicMock
+import mcp2_toolbox.cli
 from mcp2_toolbox.cli import (
     Device,
     MCP2ToolboxError,
     ConfigurationError,
     DeviceError,
     load_config,
+    _optional_module,
+    _cfg_load,
+    _cfg_save,
+    _YAML_CACHE,
     discover,
+    _resolve_ip,
+    _write_discovery_cache,
+    _DISC_TTL,
+    _env_with,
+    _parse_kv,
+    _run_script,
     cmd_list,
+    gum_available,
+    _gum_input,
     cmd_ui,
     cmd_new,
     cmd_watch,
@@ -19,10 +40,38 @@ from mcp2_toolbox.cli import (
     cmd_hook_install,
     cmd_config,
     create_parser,
+    _fast_args,
+    _FAST_COMMANDS,
+    _SCRIPT_PATHS,
     main
 )
 
 
+class TestImports:
+    """Test module import cost."""
+    
+    def test_optional_module(self):
+        """Test optional imports resolve to the module, or None when missing."""
+        assert _optional_module('json') is json
+        assert _optional_module('mcp2_toolbox_no_such_module') is None
+    
+    def test_heavy_modules_not_imported(self):
+        """Test importing the CLI does not pull in optional, spawn-only or discovery-only modules."""
+        modules = ('yaml', 'zeroconf', 'subprocess', 'shlex', 'socket', 'queue', 'concurrent.futures')
+        code = (
+            "import sys, mcp2_toolbox.cli; "
+            f"print(','.join(m for m in {modules!r} if m in sys.modules))"
+        )
+        out = subprocess.run([sys.executable, "-c", code], stdout=subprocess.PIPE, text=True, check=True)
+        assert out.stdout.strip() == ""
+    
+    def test_import_installs_no_root_handlers(self):
+        """Test importing the CLI leaves the root logger unconfigured."""
+        code = "import logging, mcp2_toolbox.cli; print(len(logging.getLogger().handlers))"
+        out = subprocess.run([sys.executable, "-c", code], stdout=subprocess.PIPE, text=True, check=True)
+        assert out.stdout.strip() == "0"
+
+
 class TestDevice:
     """Test Device dataclass."""
     
@@ -31,6 +80,17 @@ class TestDevice:
         device = Device(name="test-device", ip="192.168.1.100")
         assert device.name == "test-device"
         assert device.ip == "192.168.1.100"
+    
+    def test_device_frozen_and_hashable(self):
+        """Test devices are immutable, slotted and dedupe in a set."""
+        device = Device(name="test-device", ip="192.168.1.100")
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            device.ip = "192.168.1.101"
+        assert not hasattr(device, '__dict__')
+        assert len({device, Device(name="test-device", ip="192.168.1.100")}) == 1
+        assert copy.copy(device) == device
+        assert copy.deepcopy(device) == device
+        assert pickle.loads(pickle.dumps(device)) == device
 
 
 class TestExceptions:
@@ -57,107 +117,571 @@ class TestLoadConfig:
     
     def test_load_config_no_file(self):
         """Test loading config when file doesn't exist."""
-        with patch('os.path.expanduser', return_value='/nonexistent/path'):
+        with patch('mcp2_toolbox.cli._cfg_path', return_value='/nonexistent/path'):
             config = load_config()
             assert config == {}
     
-    @patch('mcp2_toolbox.cli.yaml')
-    def test_load_config_yaml_error(self, mock_yaml):
+    @patch('yaml.load')
+    def test_load_config_yaml_error(self, mock_load):
         """Test loading config with YAML error."""
-        mock_yaml.safe_load.side_effect = Exception("YAML error")
+        mock_load.side_effect = Exception("YAML error")
         
         with tempfile.NamedTemporaryFile(mode='w', delete=False) as f:
             f.write("invalid: yaml: content")
             temp_path = f.name
         
         try:
-            with patch('os.path.expanduser', return_value=temp_path):
+            with patch('mcp2_toolbox.cli._cfg_path', return_value=temp_path):
                 with pytest.raises(ConfigurationError):
                     load_config()
         finally:
             os.unlink(temp_path)
     
-    @patch('mcp2_toolbox.cli.yaml')
-    def test_load_config_success(self, mock_yaml):
+    def test_load_config_invalid_yaml(self):
+        """Test a real YAML syntax error is reported as ConfigurationError."""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.yml', delete=False) as f:
+            f.write("project: [unclosed")
+            temp_path = f.name
+        
+        try:
+            with patch('mcp2_toolbox.cli._cfg_path', return_value=temp_path):
+                with pytest.raises(ConfigurationError, match="Invalid YAML"):
+                    load_config()
+        finally:
+            os.unlink(temp_path)
+    
+    def test_load_config_not_a_mapping(self):
+        """Test valid YAML that is not a mapping is rejected without caching it."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "mcp2-toolbox.yml")
+            with open(path, 'w') as f:
+                f.write("- a\n")
+            with patch('mcp2_toolbox.cli._cfg_path', return_value=path):
+                with pytest.raises(ConfigurationError, match="must contain a mapping"):
+                    load_config()
+            assert path not in _YAML_CACHE
+            assert not os.path.exists(path + ".json")
+    
+    @patch('mcp2_toolbox.cli._optional_module', return_value=None)
+    def test_load_config_no_yaml(self, mock_optional):
+        """Test an existing config without PyYAML or a sidecar loads as empty."""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.yml', delete=False) as f:
+            f.write("test: value")
+            temp_path = f.name
+        
+        try:
+            with patch('mcp2_toolbox.cli._cfg_path', return_value=temp_path):
+                assert load_config() == {}
+        finally:
+            os.unlink(temp_path)
+    
+    @patch('yaml.load')
+    def test_load_config_success(self, mock_load):
         """Test successful config loading."""
-        mock_yaml.safe_load.return_value = {"test": "value"}
+        mock_load.return_value = {"test": "value"}
         
         with tempfile.NamedTemporaryFile(mode='w', delete=False) as f:
             f.write("test: value")
             temp_path = f.name
         
         try:
-            with patch('os.path.expanduser', return_value=temp_path):
+            with patch('mcp2_toolbox.cli._cfg_path', return_value=temp_path):
                 config = load_config()
                 assert config == {"test": "value"}
         finally:
             os.unlink(temp_path)
+            os.unlink(temp_path + ".json")
+    
+    @patch('yaml.load')
+    def test_load_config_cached(self, mock_load):
+        """Test repeated loads share one read-only parse until the file changes."""
+        mock_load.return_value = {"test": "value"}
+        
+        with tempfile.NamedTemporaryFile(mode='w', delete=False) as f:
+            f.write("test: value")
+            temp_path = f.name
+        
+        try:
+            with patch('mcp2_toolbox.cli._cfg_path', return_value=temp_path):
+                first = load_config()
+                with pytest.raises(TypeError):
+                    first["test"] = "mutated"
+                assert load_config() == {"test": "value"}
+                assert _cfg_load() == {"test": "value"}
+                assert mock_load.call_count == 1
+                
+                with open(temp_path, 'w') as f:
+                    f.write("test: other")
+                later = os.path.getmtime(temp_path + ".json") + 1
+                os.utime(temp_path, (later, later))
+                load_config()
+                assert mock_load.call_count == 2
+        finally:
+            os.unlink(temp_path)
+            os.unlink(temp_path + ".json")
+    
+    @patch('yaml.dump')
+    def test_cfg_save_invalidates_cache(self, mock_dump):
+        """Test saving the config drops its cached parse."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "mcp2-toolbox.yml")
+            _YAML_CACHE[path] = (0, 0, {"stale": "value"})
+            with patch('mcp2_toolbox.cli._cfg_path', return_value=path):
+                _cfg_save({"test": "value"})
+            assert path not in _YAML_CACHE
+    
+    def test_cfg_round_trip(self):
+        """Test config written by _cfg_save reads back through _cfg_load."""
+        cfg = {"project": "/tmp/project", "elf": "/tmp/app.elf", "build": "make", "pcsx2_exe": ""}
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "mcp2-toolbox.yml")
+            with patch('mcp2_toolbox.cli._cfg_path', return_value=path):
+                _cfg_save(cfg)
+                assert _cfg_load() == cfg
+                with open(path) as f:
+                    assert f.read().startswith("build: make\n")
+    
+    def test_cfg_load_prefers_json_sidecar(self):
+        """Test a fresh JSON sidecar is read instead of parsing the YAML."""
+        cfg = {"project": "/tmp/project", "build": "make"}
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "mcp2-toolbox.yml")
+            with patch('mcp2_toolbox.cli._cfg_path', return_value=path):
+                _cfg_save(cfg)
+                assert os.path.exists(path + ".json")
+                _YAML_CACHE.pop(path, None)
+                with patch('yaml.load') as mock_load:
+                    assert _cfg_load() == cfg
+                    mock_load.assert_not_called()
+    
+    def test_cfg_save_skips_lossy_json_sidecar(self):
+        """Test no sidecar is written when JSON would change the data."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "mcp2-toolbox.yml")
+            with patch('mcp2_toolbox.cli._cfg_path', return_value=path):
+                _cfg_save({1: "x"})
+                assert not os.path.exists(path + ".json")
+                assert _cfg_load() == {1: "x"}
+                _YAML_CACHE.pop(path, None)
+                assert _cfg_load() == {1: "x"}
+    
+    def test_cfg_load_ignores_stale_json_sidecar(self):
+        """Test a YAML file edited after the sidecar was written wins."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "mcp2-toolbox.yml")
+            with patch('mcp2_toolbox.cli._cfg_path', return_value=path):
+                _cfg_save({"build": "make"})
+                with open(path, 'w') as f:
+                    f.write("build: ninja\n")
+                later = os.path.getmtime(path + ".json") + 1
+                os.utime(path, (later, later))
+                assert _cfg_load() == {"build": "ninja"}
+                with open(path + ".json") as f:
+                    assert json.load(f)["data"] == {"build": "ninja"}
+    
+    def test_cfg_load_ignores_sidecar_for_restored_yaml(self):
+        """Test a YAML file restored with an older mtime is not shadowed by the sidecar."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "mcp2-toolbox.yml")
+            with patch('mcp2_toolbox.cli._cfg_path', return_value=path):
+                _cfg_save({"build": "make"})
+                with open(path, 'w') as f:
+                    f.write("build: ninja\n")
+                earlier = os.path.getmtime(path + ".json") - 60
+                os.utime(path, (earlier, earlier))
+                assert load_config() == {"build": "ninja"}
+
+
+def _service_info(*addresses):
+    """A real zeroconf ServiceInfo for an MCP2 card with the given addresses."""
+    from zeroconf import ServiceInfo
+    return ServiceInfo(
+        "_memcardpro._tcp.local.", "mcp2._memcardpro._tcp.local.",
+        port=80, parsed_addresses=list(addresses),
+    )
 
 
 class TestDiscover:
     """Test device discovery."""
     
-    @patch('mcp2_toolbox.cli.Zeroconf', None)
-    def test_discover_no_zeroconf(self):
+    @pytest.fixture(autouse=True)
+    def _isolate_discovery_cache(self, tmp_path, monkeypatch):
+        """Keep the on-disk discovery cache out of the user's home."""
+        monkeypatch.setattr('mcp2_toolbox.cli._DISC_CACHE', str(tmp_path / 'mcp2-discovered.json'))
+        monkeypatch.setattr('mcp2_toolbox.cli._ZC', None)
+        monkeypatch.setattr('mcp2_toolbox.cli._BROWSERS', {})
+        monkeypatch.setattr('mcp2_toolbox.cli.atexit.register', MagicMock())
+    
+    @patch('mcp2_toolbox.cli._optional_module', return_value=None)
+    def test_discover_no_zeroconf(self, mock_optional):
         """Test discovery when Zeroconf is not available."""
         devices = discover()
         assert devices == []
     
-    @patch('mcp2_toolbox.cli.Zeroconf')
-    @patch('mcp2_toolbox.cli.ServiceBrowser')
+    @patch('zeroconf.Zeroconf')
+    @patch('zeroconf.ServiceBrowser')
     def test_discover_success(self, mock_browser, mock_zeroconf):
         """Test successful device discovery."""
         # Mock Zeroconf instance
         mock_zc_instance = MagicMock()
         mock_zeroconf.return_value = mock_zc_instance
         
-        # Mock service info
-        mock_info = MagicMock()
-        mock_info.addresses = [[192, 168, 1, 100]]
-        mock_zc_instance.get_service_info.return_value = mock_info
+        mock_zc_instance.get_service_info.return_value = _service_info("192.168.1.100")
         
         devices = discover(timeout_sec=0.1)
         
         # Verify Zeroconf was used
         mock_zeroconf.assert_called_once()
         mock_browser.assert_called_once()
-        mock_zc_instance.close.assert_called_once()
+        mock_browser.return_value.cancel.assert_not_called()
+        mock_zc_instance.close.assert_not_called()
+    
+    @patch('zeroconf.Zeroconf')
+    @patch('zeroconf.ServiceBrowser')
+    def test_discover_browses_memcardpro_only(self, mock_browser, mock_zeroconf):
+        """Test only the MCP2 service type is browsed, not generic _http._tcp."""
+        discover(timeout_sec=0.01, use_cache=False)
+        
+        assert list(mock_browser.call_args[0][1]) == ['_memcardpro._tcp.local.']
+    
+    @patch('zeroconf.Zeroconf')
+    @patch('zeroconf.ServiceBrowser')
+    def test_discover_reuses_zeroconf(self, mock_browser, mock_zeroconf):
+        """Test repeated discovery shares one Zeroconf instance and browser, closed at exit."""
+        discover(timeout_sec=0.01, use_cache=False)
+        discover(timeout_sec=0.01, use_cache=False)
+        
+        mock_zeroconf.assert_called_once()
+        mock_browser.assert_called_once()
+        registered = [c[0][0] for c in mcp2_toolbox.cli.atexit.register.call_args_list]
+        assert registered == [mock_zeroconf.return_value.close, mock_browser.return_value.cancel]
+    
+    @patch('zeroconf.Zeroconf')
+    @patch('zeroconf.ServiceBrowser')
+    def test_discover_remembers_devices(self, mock_browser, mock_zeroconf):
+        """Test later calls reuse resolved devices until the service is removed."""
+        mock_zc_instance = mock_zeroconf.return_value
+        mock_zc_instance.get_service_info.return_value = _service_info("192.168.1.100")
+        name = "mcp2._memcardpro._tcp.local."
+        listeners = []
+        
+        def browse(zc, types, listener):
+            listeners.append(listener)
+            listener.add_service(zc, types[0], name)
+            return MagicMock()
+        mock_browser.side_effect = browse
+        
+        assert discover(use_cache=False) == [Device(name=name, ip="192.168.1.100")]
+        assert discover(use_cache=False) == [Device(name=name, ip="192.168.1.100")]
+        mock_zc_instance.get_service_info.assert_called_once()
+        
+        listeners[0].remove_service(mock_zc_instance, "_memcardpro._tcp.local.", name)
+        assert discover(use_cache=False) == []
+    
+    @patch('zeroconf.Zeroconf')
+    @patch('zeroconf.ServiceBrowser')
+    def test_discover_returns_on_first_answer(self, mock_browser, mock_zeroconf):
+        """Test discovery stops waiting once a device has answered."""
+        mock_zc_instance = MagicMock()
+        mock_zeroconf.return_value = mock_zc_instance
+        mock_zc_instance.get_service_info.return_value = _service_info("192.168.1.100")
+        
+        def browse(zc, types, listener):
+            listener.add_service(zc, types[0], "mcp2._memcardpro._tcp.local.")
+            return MagicMock()
+        mock_browser.side_effect = browse
+        
+        start = time.monotonic()
+        devices = discover(timeout_sec=5.0)
+        
+        assert time.monotonic() - start < 2.0
+        assert devices == [Device(name="mcp2._memcardpro._tcp.local.", ip="192.168.1.100")]
+    
+    @patch('zeroconf.Zeroconf')
+    @patch('zeroconf.ServiceBrowser')
+    def test_discover_resolves_concurrently(self, mock_browser, mock_zeroconf):
+        """Test announced services are resolved in parallel, in announcement order."""
+        mock_zc_instance = MagicMock()
+        mock_zeroconf.return_value = mock_zc_instance
+        names = [f"mcp2-{i}._memcardpro._tcp.local." for i in range(4)]
+        
+        def get_service_info(t, name, timeout):
+            time.sleep(0.3)
+            return _service_info(f"192.168.1.{100 + names.index(name)}")
+        mock_zc_instance.get_service_info.side_effect = get_service_info
+        
+        def browse(zc, types, listener):
+            for name in names:
+                listener.add_service(zc, types[0], name)
+            return MagicMock()
+        mock_browser.side_effect = browse
+        
+        start = time.monotonic()
+        devices = discover(timeout_sec=5.0)
+        
+        assert time.monotonic() - start < 1.0
+        assert [d.name for d in devices] == names
+        assert devices[3].ip == "192.168.1.103"
+    
+    def test_resolve_ip_address_families(self):
+        """Test IPv4 is preferred and IPv6-only devices still resolve."""
+        zc = MagicMock()
+        zc.get_service_info.return_value = _service_info("fe80::1", "10.0.0.7")
+        assert _resolve_ip(zc, "_memcardpro._tcp.local.", "mcp2") == "10.0.0.7"
+        
+        zc.get_service_info.return_value = _service_info("fe80::1")
+        assert _resolve_ip(zc, "_memcardpro._tcp.local.", "mcp2") == "fe80::1"
+        
+        zc.get_service_info.return_value = _service_info()
+        assert _resolve_ip(zc, "_memcardpro._tcp.local.", "mcp2") is None
+        
+        zc.get_service_info.return_value = None
+        assert _resolve_ip(zc, "_memcardpro._tcp.local.", "mcp2") is None
+    
+    @patch('mcp2_toolbox.cli._optional_module', return_value=None)
+    def test_discover_uses_fresh_cache(self, mock_optional):
+        """Test a recent discovery result is reused without scanning."""
+        devices = [Device(name="device1", ip="192.168.1.100")]
+        _write_discovery_cache(devices)
+        
+        assert discover() == devices
+        assert discover(use_cache=False) == []
+    
+    @patch('mcp2_toolbox.cli._optional_module', return_value=None)
+    def test_discover_ignores_stale_cache(self, mock_optional):
+        """Test a cache older than the TTL triggers a new scan."""
+        with patch('time.time', return_value=1000.0):
+            _write_discovery_cache([Device(name="device1", ip="192.168.1.100")])
+        
+        with patch('time.time', return_value=1000.0 + _DISC_TTL + 1):
+            assert discover() == []
 
 
 class TestCommands:
     """Test command functions."""
     
     @patch('mcp2_toolbox.cli.discover')
-    def test_cmd_list(self, mock_discover):
+    def test_cmd_list(self, mock_discover, capsys):
         """Test list command."""
         mock_discover.return_value = [
             Device(name="device1", ip="192.168.1.100"),
             Device(name="device2", ip="192.168.1.101")
         ]
         
-        # Capture print output
-        with patch('builtins.print') as mock_print:
+        with patch('sys.stdout.write', wraps=sys.stdout.write) as mock_write:
             cmd_list()
-            
-            # Verify devices were printed
-            assert mock_print.call_count >= 2
+        
+        # One write for the whole listing
+        mock_write.assert_called_once()
+        assert capsys.readouterr().out == "device1\t192.168.1.100\ndevice2\t192.168.1.101\n"
     
     @patch('mcp2_toolbox.cli.discover')
-    def test_cmd_list_no_devices(self, mock_discover):
+    def test_cmd_list_no_devices(self, mock_discover, capsys):
         """Test list command with no devices."""
         mock_discover.return_value = []
         
+        cmd_list()
+        
+        assert capsys.readouterr().out == "No MCP2 devices found (mdns). Try manual IP.\n"
+
+
+class TestGum:
+    """Test gum detection."""
+    
+    def test_gum_available_cached(self):
+        """Test gum lookup hits PATH only once per process."""
+        gum_available.cache_clear()
+        try:
+            with patch('mcp2_toolbox.cli.shutil.which', return_value='/usr/bin/gum') as mock_which:
+                assert gum_available() is True
+                assert gum_available() is True
+                mock_which.assert_called_once_with('gum')
+        finally:
+            gum_available.cache_clear()
+    
+    def test_gum_not_available(self):
+        """Test gum is reported missing when not on PATH."""
+        gum_available.cache_clear()
+        try:
+            with patch('mcp2_toolbox.cli.shutil.which', return_value=None):
+                assert gum_available() is False
+        finally:
+            gum_available.cache_clear()
+    
+    @patch('mcp2_toolbox.cli.gum_available', return_value=True)
+    @patch('subprocess.check_output')
+    @patch('mcp2_toolbox.cli.discover')
+    def test_cmd_ui_gum_choose(self, mock_discover, mock_output, mock_gum):
+        """Test ui passes device labels straight to gum without a shell."""
+        mock_discover.return_value = [Device(name="it's-mcp2", ip="192.168.1.100")]
+        mock_output.return_value = "it's-mcp2 (192.168.1.100)\n"
+        
         with patch('builtins.print') as mock_print:
-            cmd_list()
+            cmd_ui()
+        
+        assert mock_output.call_args[0][0] == ["gum", "choose", "it's-mcp2 (192.168.1.100)"]
+        assert 'shell' not in mock_output.call_args[1]
+        mock_print.assert_called_with("Using target 192.168.1.100")
+    
+    @patch('subprocess.check_output')
+    def test_gum_input_keeps_initial(self, mock_output):
+        """Test an empty gum input falls back to the initial value, with the label shown."""
+        mock_output.return_value = "\n"
+        
+        assert _gum_input("BUILD_CMD", "make") == "make"
+        argv = mock_output.call_args[0][0]
+        assert argv == ["gum", "input", "--prompt", "BUILD_CMD: ", "--value", "make"]
+        # The label must not be a placeholder, which gum hides once --value fills the box
+        assert "--placeholder" not in argv
+    
+    @patch('subprocess.check_output', side_effect=subprocess.CalledProcessError(130, 'gum'))
+    def test_gum_input_cancelled(self, mock_output):
+        """Test cancelling gum input is reported like Ctrl+C at input()."""
+        with pytest.raises(KeyboardInterrupt):
+            _gum_input("BUILD_CMD", "make")
+    
+    @patch('mcp2_toolbox.cli.gum_available', return_value=True)
+    @patch('mcp2_toolbox.cli._cfg_save')
+    @patch('subprocess.check_output', side_effect=subprocess.CalledProcessError(130, 'gum'))
+    def test_main_config_cancelled_saves_nothing(self, mock_output, mock_save, mock_gum):
+        """Test aborting a gum prompt in config exits 130 without writing the config."""
+        with patch('sys.argv', ['mcp2-toolbox', 'config']):
+            assert main() == 130
+        
+        assert mock_output.call_count == 1
+        mock_save.assert_not_called()
+    
+    @patch('mcp2_toolbox.cli.gum_available', return_value=True)
+    @patch('subprocess.check_output', side_effect=subprocess.CalledProcessError(130, 'gum'))
+    @patch('mcp2_toolbox.cli.discover', return_value=[])
+    def test_main_ui_cancelled(self, mock_discover, mock_output, mock_gum):
+        """Test aborting gum choose in ui exits 130."""
+        with patch('sys.argv', ['mcp2-toolbox', 'ui']):
+            assert main() == 130
+
+
+class TestRunScript:
+    """Test script launching."""
+    
+    @patch('subprocess.run')
+    def test_run_script_foreground(self, mock_run):
+        """Test foreground scripts return the child's exit code."""
+        mock_run.return_value = MagicMock(returncode=3)
+        
+        rc = _run_script('/scripts/build.sh', ['--fast'], env_overrides={'BUILD_CMD': 'make'})
+        
+        assert rc == 3
+        cmd = mock_run.call_args[0][0]
+        kwargs = mock_run.call_args[1]
+        assert cmd == ['/scripts/build.sh', '--fast']
+        assert kwargs['env']['BUILD_CMD'] == 'make'
+        assert kwargs['close_fds'] is False
+    
+    @patch('mcp2_toolbox.cli.os.name', 'posix')
+    @patch('mcp2_toolbox.cli.os.execvpe')
+    def test_run_script_replace(self, mock_exec):
+        """Test terminal foreground scripts replace the process on POSIX."""
+        mock_exec.side_effect = SystemExit(0)
+        with patch('subprocess.run') as mock_run, pytest.raises(SystemExit):
+            _run_script('/scripts/run.sh', ['--elf', 'a.elf'], env_overrides={'WIN_PCSX2_EXE': 'pcsx2.exe'}, replace=True)
+        
+        mock_run.assert_not_called()
+        path, argv, env = mock_exec.call_args[0]
+        assert path == '/scripts/run.sh'
+        assert argv == ['/scripts/run.sh', '--elf', 'a.elf']
+        assert env['WIN_PCSX2_EXE'] == 'pcsx2.exe'
+    
+    @patch('mcp2_toolbox.cli.os.name', 'nt')
+    @patch('mcp2_toolbox.cli.os.execvpe')
+    @patch('subprocess.run')
+    def test_run_script_replace_windows(self, mock_run, mock_exec):
+        """Test Windows keeps waiting on a child process instead of exec."""
+        mock_run.return_value = MagicMock(returncode=0)
+        
+        assert _run_script('C:/scripts/run.sh', replace=True) == 0
+        mock_exec.assert_not_called()
+    
+    @patch('subprocess.Popen')
+    def test_run_script_background(self, mock_popen):
+        """Test background scripts are started without waiting."""
+        mock_popen.return_value = MagicMock(pid=1234)
+        
+        with patch('builtins.print'):
+            rc = _run_script('/scripts/watch.sh', background=True)
+        
+        assert rc == 0
+        assert mock_popen.call_args[0][0] == ['/scripts/watch.sh']
+        assert mock_popen.call_args[1]['close_fds'] is False
+    
+    @patch('subprocess.Popen')
+    def test_run_script_background_quotes_for_tty(self, mock_popen):
+        """Test the started line is shell-quoted only when stdout is a terminal."""
+        mock_popen.return_value = MagicMock(pid=1234)
+        cmd = ('/scripts/my run.sh', ['--elf', 'a.elf'])
+        
+        with patch('sys.stdout') as mock_stdout, patch('builtins.print') as mock_print:
+            mock_stdout.isatty.return_value = True
+            _run_script(*cmd, background=True)
+            assert mock_print.call_args[0][0] == "started: pid=1234 -> '/scripts/my run.sh' --elf a.elf"
             
-            # Should print "No MCP2 devices found"
-            calls = [call[0][0] for call in mock_print.call_args_list]
-            assert any("No MCP2 devices found" in call for call in calls)
+            mock_stdout.isatty.return_value = False
+            _run_script(*cmd, background=True)
+            assert mock_print.call_args[0][0] == "started: pid=1234 -> /scripts/my run.sh --elf a.elf"
+
+
+class TestEnvWith:
+    """Test child environment construction."""
+    
+    def test_env_with_no_overrides_reuses_environ(self):
+        """Test os.environ is passed through when nothing is overridden."""
+        assert _env_with() is os.environ
+        assert _env_with({}) is os.environ
+        assert _env_with({'BUILD_CMD': None, 'TARGET_ELF': None}) is os.environ
+    
+    def test_env_with_tracks_environ_changes(self):
+        """Test variables set after import reach the child environment."""
+        with patch.dict(os.environ, {'MCP2_TEST_VAR': '1'}):
+            assert _env_with()['MCP2_TEST_VAR'] == '1'
+            assert _env_with({'BUILD_CMD': 'make'})['MCP2_TEST_VAR'] == '1'
+    
+    def test_env_with_overrides(self):
+        """Test overrides apply to a copy and None values are dropped."""
+        env = _env_with({'BUILD_CMD': 'make', 'TARGET_ELF': None})
+        assert env['BUILD_CMD'] == 'make'
+        assert 'TARGET_ELF' not in env or env['TARGET_ELF'] == os.environ.get('TARGET_ELF')
+        assert 'BUILD_CMD' not in _env_with() or _env_with()['BUILD_CMD'] != 'make'
+
+
+class TestParseKv:
+    """Test script option parsing."""
+    
+    def test_parse_kv(self):
+        """Test known flags map to keys and other tokens are skipped."""
+        args = ['--win', '--project', './p', '--elf', 'a.elf', '--build', 'make', '--pcsx2-exe', 'pcsx2.exe']
+        assert _parse_kv(args) == {
+            'project': './p',
+            'elf': 'a.elf',
+            'build': 'make',
+            'pcsx2_exe': 'pcsx2.exe',
+        }
+    
+    def test_parse_kv_missing_value(self):
+        """Test a trailing flag without a value exits."""
+        with pytest.raises(SystemExit, match="missing value for --elf"):
+            _parse_kv(['--elf'])
 
 
 class TestParser:
     """Test argument parser."""
     
+    def test_create_parser_memoized(self, monkeypatch):
+        """Test the parser is built once but still tracks CONSOLE_HAX_BASE."""
+        assert create_parser() is create_parser()
+        monkeypatch.setenv('CONSOLE_HAX_BASE', '/tmp/console-hax')
+        assert create_parser().parse_args(['list']).base_path == '/tmp/console-hax'
+    
     def test_create_parser(self):
         """Test parser creation."""
         parser = create_parser()
@@ -175,6 +699,10 @@ class TestParser:
         args = parser.parse_args(['list'])
         assert args.command == 'list'
         
+        # Test list command with cache bypass
+        args = parser.parse_args(['list', '--no-cache'])
+        assert args.no_cache is True
+        
         # Test new command
         args = parser.parse_args(['new', 'test-project'])
         assert args.command == 'new'
@@ -190,6 +718,25 @@ class TestParser:
 class TestMain:
     """Test main function."""
     
+    def test_fast_args_match_parser(self):
+        """Test the argparse-free fast path yields the same namespace as the parser."""
+        parser = create_parser()
+        for command in _FAST_COMMANDS:
+            assert vars(_fast_args([command])) == vars(parser.parse_args([command]))
+        assert _fast_args(['list', '--no-cache']) is None
+        assert _fast_args(['--help']) is None
+        assert _fast_args([]) is None
+    
+    @patch('mcp2_toolbox.cli.cmd_list', return_value=None)
+    @patch('mcp2_toolbox.cli.create_parser')
+    def test_main_fast_path(self, mock_parser, mock_cmd_list):
+        """Test a bare list command is dispatched without building the parser."""
+        with patch('sys.argv', ['mcp2-toolbox', 'list']):
+            assert main() == 0
+        
+        mock_parser.assert_not_called()
+        mock_cmd_list.assert_called_once_with(no_cache=False)
+    
     def test_main_no_command(self):
         """Test main with no command."""
         with patch('sys.argv', ['mcp2-toolbox']):
@@ -201,9 +748,114 @@ class TestMain:
                 result = main()
                 assert result == 1
     
+    @pytest.fixture
+    def base(self, tmp_path):
+        """A console-hax base directory containing the helper scripts."""
+        for parts in _SCRIPT_PATHS.values():
+            script = tmp_path.joinpath(*parts)
+            script.parent.mkdir(parents=True, exist_ok=True)
+            script.touch()
+        return str(tmp_path)
+    
+    @patch('mcp2_toolbox.cli._run_script', return_value=7)
+    def test_main_returns_script_exit_code(self, mock_run_script, base):
+        """Test main dispatches to the command and returns its exit code."""
+        with patch('sys.argv', ['mcp2-toolbox', '--base-path', base, 'new', 'proj']):
+            assert main() == 7
+        
+        mock_run_script.assert_called_once_with(
+            os.path.join(base, 'hg_ps2_bootstrap', 'scripts', 'new_visualizer.sh'),
+            ['proj', os.path.join(base, 'proj')],
+            replace=True,
+        )
+    
+    @patch('mcp2_toolbox.cli._run_script', return_value=0)
+    def test_main_watch_options(self, mock_run_script, base):
+        """Test watch options reach the script environment."""
+        argv = ['mcp2-toolbox', '--base-path', base, 'watch', '--win', '--elf', 'a.elf', '--build', 'make']
+        with patch('sys.argv', argv):
+            assert main() == 0
+        
+        script = mock_run_script.call_args[0][0]
+        env = mock_run_script.call_args[1]['env_overrides']
+        assert script == os.path.join(base, 'pcsx2_scaffold', 'scripts', 'watch_build_run_win.sh')
+        assert env['TARGET_ELF'] == 'a.elf'
+        assert env['BUILD_CMD'] == 'make'
+        assert env['TARGET_PROJECT'] is None
+    
+    @patch('mcp2_toolbox.cli._run_script', return_value=0)
+    def test_main_run_matches_list_adapter(self, mock_run_script, base):
+        """Test main passes run options straight through, same as cmd_run's flag list."""
+        argv = ['mcp2-toolbox', '--base-path', base, 'run', '--win', '--elf', 'a.elf', '--pcsx2-exe', 'pcsx2.exe']
+        with patch('sys.argv', argv):
+            assert main() == 0
+        cmd_run(argv[4:])
+        
+        main_call, adapter_call = mock_run_script.call_args_list
+        assert main_call == adapter_call
+        assert main_call[1]['args'] == ['--elf', 'a.elf']
+        assert main_call[1]['env_overrides'] == {'WIN_PCSX2_EXE': 'pcsx2.exe'}
+    
+    @patch('mcp2_toolbox.cli._run_script', return_value=0)
+    def test_main_hook_install_default_repo(self, mock_run_script, base):
+        """Test hook-install defaults to the bundled visualizer project."""
+        with patch('sys.argv', ['mcp2-toolbox', '--base-path', base, 'hook-install']):
+            assert main() == 0
+        
+        assert mock_run_script.call_args[0][1] == [os.path.join(base, 'hairglasses_ps2_visualizer_classic')]
+    
+    @patch('mcp2_toolbox.cli._run_script')
+    def test_main_missing_script(self, mock_run_script, tmp_path):
+        """Test a base path without the helper scripts fails before spawning."""
+        with patch('sys.argv', ['mcp2-toolbox', '--base-path', str(tmp_path), 'run']):
+            assert main() == 1
+        
+        mock_run_script.assert_not_called()
+    
+    @patch('mcp2_toolbox.cli.cmd_list', return_value=None)
+    @patch('logging.basicConfig', wraps=logging.basicConfig)
+    def test_main_configures_logging(self, mock_basic_config, mock_cmd_list):
+        """Test logging is set up by main, with timestamps only when verbose."""
+        root = logging.getLogger()
+        saved_level = root.level
+        try:
+            with patch('sys.argv', ['mcp2-toolbox', 'list']):
+                assert main() == 0
+            assert mock_basic_config.call_args[1]['level'] == logging.INFO
+            assert 'asctime' not in mock_basic_config.call_args[1]['format']
+            assert root.level == logging.INFO
+            
+            with patch('sys.argv', ['mcp2-toolbox', '--verbose', 'list']):
+                assert main() == 0
+            assert mock_basic_config.call_args[1]['level'] == logging.DEBUG
+            assert 'asctime' in mock_basic_config.call_args[1]['format']
+            assert root.level == logging.DEBUG
+        finally:
+            root.setLevel(saved_level)
+    
+    @patch('mcp2_toolbox.cli.cmd_list', return_value=None)
+    def test_main_verbose_with_existing_handlers(self, mock_cmd_list):
+        """Test --verbose enables DEBUG even when the root logger is already configured."""
+        root = logging.getLogger()
+        handler = logging.NullHandler()
+        saved_level = root.level
+        root.addHandler(handler)
+        root.setLevel(logging.WARNING)
+        try:
+            with patch('sys.argv', ['mcp2-toolbox', '--verbose', 'list']):
+                assert main() == 0
+            assert root.level == logging.DEBUG
+            
+            with patch('sys.argv', ['mcp2-toolbox', 'list']):
+                assert main() == 0
+            assert root.level == logging.INFO
+        finally:
+            root.removeHandler(handler)
+            root.setLevel(saved_level)
+    
     def test_main_keyboard_interrupt(self):
         """Test main with keyboard interrupt."""
-        with patch('sys.argv', ['mcp2-toolbox', 'list']):
+        with patch('sys.argv', ['mcp2-toolbox', '--verbose', 'list']):
             with patch('mcp2_toolbox.cli.create_parser') as mock_parser:
                 mock_parser_instance = MagicMock()
                 mock_parser_instance.parse_args.side_effect = KeyboardInterrupt()
@@ -214,7 +866,7 @@ class TestMain:
     
     def test_main_mcp2_error(self):
         """Test main with MCP2ToolboxError."""
-        with patch('sys.argv', ['mcp2-toolbox', 'list']):
+        with patch('sys.argv', ['mcp2-toolbox', '--verbose', 'list']):
             with patch('mcp2_toolbox.cli.create_parser') as mock_parser:
                 mock_parser_instance = MagicMock()
                 mock_parser_instance.parse_args.side_effect = MCP2ToolboxError("Test error")